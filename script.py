@@ -27,28 +27,218 @@ from Autodesk.Revit.UI import TaskDialog, TaskDialogResult, TaskDialogCommandLin
 from Autodesk.Revit.UI.Selection import ISelectionFilter
 from Autodesk.Revit.UI import UIDocument
 
+import bisect
 import math
 
 doc = revit.doc
 
-element_collector = DB.FilteredElementCollector(doc).OfCategory(
-    DB.BuiltInCategory.OST_MechanicalEquipment
-).WhereElementIsNotElementType()
-wall_collector = DB.FilteredElementCollector(doc).OfCategory(
-    DB.BuiltInCategory.OST_Walls
-).WhereElementIsNotElementType()
-beam_collector = DB.FilteredElementCollector(doc).OfCategory(
-    DB.BuiltInCategory.OST_StructuralFraming
-).WhereElementIsNotElementType()
-
-def do_bounding_boxes_intersect(bbox1, bbox2):
-    return (bbox1.Min.X <= bbox2.Max.X and bbox1.Max.X >= bbox2.Min.X and
-            bbox1.Min.Y <= bbox2.Max.Y and bbox1.Max.Y >= bbox2.Min.Y and
-            bbox1.Min.Z <= bbox2.Max.Z and bbox1.Max.Z >= bbox2.Min.Z)
-
-def get_opposite_face_of_equipment(equip_element):
-    # Get the bounding box of the equipment
-    equip_bbox = equip_element.get_BoundingBox(None)
+TARGET_FAMILY_NAME = "ADR-10D SLEEVE CUTOUT-"
+
+# UV is immutable, so the center sample used by the face helpers is built once
+# instead of per call.
+CENTER_UV = DB.UV(0.5, 0.5)
+
+# Vertical slack when testing whether a host's Z span contains a sleeve's
+# insertion point, in feet; matches the base face-search tolerance.
+SLEEVE_Z_TOLERANCE = 0.2
+
+_bbox_cache = {}
+
+def bbox_of(element):
+    # Memoized element.get_BoundingBox(None) - every call crosses into the
+    # Revit geometry layer, and the same equipment/host boxes are read several
+    # times per run while nothing is moving them.
+    key = element.Id.IntegerValue
+    box = _bbox_cache.get(key)
+    if box is None:
+        box = element.get_BoundingBox(None)
+        _bbox_cache[key] = box
+    return box
+
+def bbox_to_bounds(bbox):
+    # Flatten a Revit BoundingBoxXYZ into a plain tuple so the broadphase
+    # never has to touch the Revit API again for the same box.
+    return (bbox.Min.X, bbox.Min.Y, bbox.Min.Z, bbox.Max.X, bbox.Max.Y, bbox.Max.Z)
+
+def plane_distance(px, py, pz, ax, ay, az, nx, ny, nz):
+    # Point-to-plane distance on plain floats. Like do_bounding_boxes_intersect
+    # this is kept free of Revit types and in nopython-compatible scalar form,
+    # so under pyRevit's CPython engine these kernels could be handed to Numba
+    # as-is; under IronPython they at least avoid allocating XYZ intermediates.
+    return abs((px - ax) * nx + (py - ay) * ny + (pz - az) * nz)
+
+def do_bounding_boxes_intersect(bounds1, bounds2):
+    return (bounds1[0] <= bounds2[3] and bounds1[3] >= bounds2[0] and
+            bounds1[1] <= bounds2[4] and bounds1[4] >= bounds2[1] and
+            bounds1[2] <= bounds2[5] and bounds1[5] >= bounds2[2])
+
+class BoundsIndex(object):
+    """Static bounding-volume tree over (payload, bounds) entries.
+
+    Built once over every wall/beam bounding box so each equipment lookup only
+    walks O(log N) nodes instead of re-testing the whole model. Bounds are the
+    flat tuples produced by bbox_to_bounds. Leaves hold their candidate boxes
+    as parallel structure-of-arrays lists so the per-candidate test reads
+    contiguous floats instead of one tuple object per entry."""
+
+    _LEAF_SIZE = 8
+
+    def __init__(self, entries):
+        # Presort by min-Z and keep the sorted starts plus a running maximum
+        # of the tops. Both lists are monotone, so a query's Z-slab of
+        # possible hosts falls out of two binary searches - equipment that is
+        # stories away from every wall/beam is rejected before any traversal.
+        entries = sorted(entries, key=lambda e: e[1][2])
+        self._minzs = [e[1][2] for e in entries]
+        self._prefix_maxzs = []
+        running_max = float('-inf')
+        for e in entries:
+            if e[1][5] > running_max:
+                running_max = e[1][5]
+            self._prefix_maxzs.append(running_max)
+        self._root = self._build(entries) if entries else None
+
+    def _build(self, entries):
+        node_bounds = (
+            min(e[1][0] for e in entries), min(e[1][1] for e in entries),
+            min(e[1][2] for e in entries), max(e[1][3] for e in entries),
+            max(e[1][4] for e in entries), max(e[1][5] for e in entries)
+        )
+        if len(entries) <= self._LEAF_SIZE:
+            payloads = [e[0] for e in entries]
+            leaf_soa = (payloads,
+                        [e[1][0] for e in entries], [e[1][1] for e in entries],
+                        [e[1][2] for e in entries], [e[1][3] for e in entries],
+                        [e[1][4] for e in entries], [e[1][5] for e in entries])
+            return (node_bounds, leaf_soa, None, None)
+        # Split at the median along the longest axis of the node bounds.
+        extents = (node_bounds[3] - node_bounds[0],
+                   node_bounds[4] - node_bounds[1],
+                   node_bounds[5] - node_bounds[2])
+        axis = extents.index(max(extents))
+        entries.sort(key=lambda e: e[1][axis] + e[1][axis + 3])
+        mid = len(entries) // 2
+        return (node_bounds, None, self._build(entries[:mid]), self._build(entries[mid:]))
+
+    def intersection(self, query_bounds):
+        hits = []
+        if self._root is None:
+            return hits
+        qminx, qminy, qminz, qmaxx, qmaxy, qmaxz = query_bounds
+        # Hosts starting above the query top cannot intersect, and neither
+        # can the prefix whose tops all sit below the query bottom.
+        hi = bisect.bisect_right(self._minzs, qmaxz)
+        lo = bisect.bisect_left(self._prefix_maxzs, qminz)
+        if lo >= hi:
+            return hits
+        stack = [self._root]
+        while stack:
+            node_bounds, leaf_soa, left, right = stack.pop()
+            if not do_bounding_boxes_intersect(node_bounds, query_bounds):
+                continue
+            if leaf_soa is not None:
+                payloads, minxs, minys, minzs, maxxs, maxys, maxzs = leaf_soa
+                for i in range(len(payloads)):
+                    if (minxs[i] <= qmaxx and maxxs[i] >= qminx and
+                            minys[i] <= qmaxy and maxys[i] >= qminy and
+                            minzs[i] <= qmaxz and maxzs[i] >= qminz):
+                        hits.append(payloads[i])
+            else:
+                stack.append(left)
+                stack.append(right)
+        return hits
+
+def collect_equipment():
+    # Materialize the collector into a plain list - Revit collectors re-query
+    # the database on every enumeration, so everything downstream iterates
+    # the list instead.
+    return list(DB.FilteredElementCollector(doc).OfCategory(
+        DB.BuiltInCategory.OST_MechanicalEquipment
+    ).WhereElementIsNotElementType())
+
+def selection_outline(selected_elements):
+    # Combined AABB of the selection. A host that never enters this box
+    # cannot intersect any selected sleeve, so it narrows the universe the
+    # broadphase has to index.
+    minx = miny = minz = float('inf')
+    maxx = maxy = maxz = float('-inf')
+    for element in selected_elements:
+        box = bbox_of(element)
+        if box is None:
+            continue
+        minx = min(minx, box.Min.X)
+        miny = min(miny, box.Min.Y)
+        minz = min(minz, box.Min.Z)
+        maxx = max(maxx, box.Max.X)
+        maxy = max(maxy, box.Max.Y)
+        maxz = max(maxz, box.Max.Z)
+    if minx == float('inf'):
+        return None
+    return DB.Outline(DB.XYZ(minx, miny, minz), DB.XYZ(maxx, maxy, maxz))
+
+def collect_hosts(outline):
+    # BoundingBoxIntersectsFilter is a native quick filter, so hosts outside
+    # the selection box are discarded inside Revit before any wrapper is
+    # materialized or any bounding box is fetched from Python.
+    wall_collector = DB.FilteredElementCollector(doc).OfCategory(
+        DB.BuiltInCategory.OST_Walls
+    ).WhereElementIsNotElementType()
+    beam_collector = DB.FilteredElementCollector(doc).OfCategory(
+        DB.BuiltInCategory.OST_StructuralFraming
+    ).WhereElementIsNotElementType()
+    if outline is not None:
+        bbox_filter = DB.BoundingBoxIntersectsFilter(outline)
+        wall_collector = wall_collector.WherePasses(bbox_filter)
+        beam_collector = beam_collector.WherePasses(bbox_filter)
+    return list(wall_collector), list(beam_collector)
+
+def build_host_index(walls, beams):
+    entries = []
+    for wall in walls:
+        wall_bbox = bbox_of(wall)
+        if wall_bbox:
+            entries.append(((wall.Id, 'Wall'), bbox_to_bounds(wall_bbox)))
+    for beam in beams:
+        beam_bbox = bbox_of(beam)
+        if beam_bbox:
+            entries.append(((beam.Id, 'Beam'), bbox_to_bounds(beam_bbox)))
+    return BoundsIndex(entries)
+
+_sleeve_diameter_cache = {}
+
+def sleeve_diameter_of(symbol):
+    # "Sleeve Diameter" lives on the type and the same symbol serves many
+    # instances, so resolve the name lookup once per symbol id. Returns the
+    # diameter in mm, or None when the symbol has no such parameter.
+    key = symbol.Id.IntegerValue
+    if key in _sleeve_diameter_cache:
+        return _sleeve_diameter_cache[key]
+    param = symbol.LookupParameter("Sleeve Diameter")
+    value = param.AsDouble() * 304.8 if param else None
+    _sleeve_diameter_cache[key] = value
+    return value
+
+_beam_width_cache = {}
+
+def beam_width_of(beam_type):
+    # Beam width in mm from the type's "b" (or legacy "B") parameter, cached
+    # per type id; None when the type defines neither.
+    key = beam_type.Id.IntegerValue
+    if key in _beam_width_cache:
+        return _beam_width_cache[key]
+    param = beam_type.LookupParameter("b")
+    if not param:
+        param = beam_type.LookupParameter("B")
+    if param and param.StorageType == StorageType.Double:
+        value = param.AsDouble() * 304.8
+    else:
+        value = None
+    _beam_width_cache[key] = value
+    return value
+
+def get_opposite_face_of_equipment(equip_bbox):
+    # Takes the already-fetched bounding box so callers thread one fetch
+    # through instead of re-reading it here.
     if equip_bbox is None:
         return None
 
@@ -59,63 +249,111 @@ def get_opposite_face_of_equipment(equip_element):
 
     return far_end_point
 
+def face_center_point(face):
+    # Cheap stand-in for the face location: evaluate at the center of its
+    # UV bounding box.
+    uv_box = face.GetBoundingBox()
+    center_uv = DB.UV((uv_box.Min.U + uv_box.Max.U) / 2.0,
+                      (uv_box.Min.V + uv_box.Max.V) / 2.0)
+    return face.Evaluate(center_uv)
+
 def find_intersecting_face_based_on_far_end(geo_element, far_end_point, equip_bbox, base_tolerance=0.2):
     diameter = max(equip_bbox.Max.X - equip_bbox.Min.X, equip_bbox.Max.Y - equip_bbox.Min.Y)
     threshold = 0.3937  # 120 mm in feet
     tolerance = base_tolerance * (diameter / threshold) if diameter > threshold else base_tolerance
+    early_exit = tolerance * 0.1
 
+    # Filter down to real solids once; Revit geometry often contains empty
+    # solids and non-solid objects that the face loops would re-test.
+    solids = [g for g in geo_element if isinstance(g, DB.Solid) and g.Volume > 1e-9]
     closest_face = None
     min_distance = float('inf')
-    for geo_obj in geo_element:
-        if isinstance(geo_obj, DB.Solid):
-            for face in geo_obj.Faces:
+    for geo_obj in solids:
+        # Order faces by how close their centers are to the far end so the
+        # expensive Project call hits a qualifying face first, and return
+        # immediately once a planar face is well within tolerance.
+        faces = sorted(geo_obj.Faces,
+                       key=lambda f: face_center_point(f).DistanceTo(far_end_point))
+        for face in faces:
+            # Planar faces (the usual case for beams) project as a plain
+            # point-to-plane distance; only curved faces still need the
+            # general-purpose managed Project call.
+            is_planar = isinstance(face, DB.PlanarFace)
+            if is_planar:
+                origin = face.Origin
+                normal = face.FaceNormal
+                distance = plane_distance(far_end_point.X, far_end_point.Y, far_end_point.Z,
+                                          origin.X, origin.Y, origin.Z,
+                                          normal.X, normal.Y, normal.Z)
+            else:
                 proj = face.Project(far_end_point)
-                if proj:
-                    distance = proj.Distance
-                    if distance < min_distance and distance <= tolerance:
-                        min_distance = distance
-                        closest_face = face
+                if not proj:
+                    continue
+                distance = proj.Distance
+            if is_planar and distance <= early_exit:
+                return face
+            if distance < min_distance and distance <= tolerance:
+                min_distance = distance
+                closest_face = face
     return closest_face
 
 def find_intersecting_face(geo_element, point, tolerance=0.2):
+    solids = [g for g in geo_element if isinstance(g, DB.Solid) and g.Volume > 1e-9]
     closest_face = None
     min_distance = float('inf')
-    for geo_obj in geo_element:
-        if isinstance(geo_obj, DB.Solid):
-            for face in geo_obj.Faces:
+    for geo_obj in solids:
+        for face in geo_obj.Faces:
+            if isinstance(face, DB.PlanarFace):
+                origin = face.Origin
+                normal = face.FaceNormal
+                dist = plane_distance(point.X, point.Y, point.Z,
+                                      origin.X, origin.Y, origin.Z,
+                                      normal.X, normal.Y, normal.Z)
+            else:
                 proj = face.Project(point)
-                if proj:
-                    if proj.Distance < min_distance:
-                        min_distance = proj.Distance
-                        closest_face = face
+                if not proj:
+                    continue
+                dist = proj.Distance
+            if dist < min_distance:
+                min_distance = dist
+                closest_face = face
     if closest_face is None or min_distance > tolerance:
-        sample_uvs = [DB.UV(u, v) for u in [0.2, 0.4, 0.6, 0.8] for v in [0.2, 0.4, 0.6, 0.8]]
-        for geo_obj in geo_element:
-            if isinstance(geo_obj, DB.Solid):
-                for face in geo_obj.Faces:
-                    if isinstance(face, DB.PlanarFace):
-                        for uv in sample_uvs:
-                            sample_pt = face.Evaluate(uv)
-                            normal = face.ComputeNormal(uv)
-                            dist = abs((point - sample_pt).DotProduct(normal))
-                            if dist < tolerance and dist < min_distance:
-                                min_distance = dist
-                                closest_face = face
+        # Planar faces have one normal, so the point-to-plane distance is the
+        # same for any in-plane sample - one Evaluate/ComputeNormal per face
+        # replaces the old 16-point UV grid.
+        early_exit = tolerance * 0.1
+        planar_faces = [f for s in solids for f in s.Faces if isinstance(f, DB.PlanarFace)]
+        for face in planar_faces:
+            anchor = face.Evaluate(CENTER_UV)
+            normal = face.ComputeNormal(CENTER_UV)
+            dist = plane_distance(point.X, point.Y, point.Z,
+                                  anchor.X, anchor.Y, anchor.Z,
+                                  normal.X, normal.Y, normal.Z)
+            if dist < tolerance and dist < min_distance:
+                min_distance = dist
+                closest_face = face
+                if dist <= early_exit:
+                    break
     return closest_face
 
-family_collector = DB.FilteredElementCollector(doc).OfClass(Family).WhereElementIsNotElementType()
-family_symbols_dict = {}
-for family in family_collector:
-    if family.Name == "ADR-10D SLEEVE CUTOUT-":
-        target_family = family
-        if hasattr(target_family, 'GetFamilySymbolIds'):
-            symbol_ids = target_family.GetFamilySymbolIds()
-            family_symbols_dict[family.Name] = [str(sid) for sid in symbol_ids] if symbol_ids else []
+def collect_family_symbols():
+    # Let Revit evaluate the family-name comparison natively instead of
+    # marshalling every loaded family's Name into Python just to compare it.
+    provider = DB.ParameterValueProvider(ElementId(DB.BuiltInParameter.SYMBOL_FAMILY_NAME_PARAM))
+    rule = DB.FilterStringRule(provider, DB.FilterStringEquals(), TARGET_FAMILY_NAME)
+    symbols = DB.FilteredElementCollector(doc).OfClass(DB.FamilySymbol).WherePasses(
+        DB.ElementParameterFilter(rule))
+    family_symbols_dict = {}
+    symbol_ids = [str(symbol.Id) for symbol in symbols]
+    if symbol_ids:
+        family_symbols_dict[TARGET_FAMILY_NAME] = symbol_ids
+    return family_symbols_dict
 
-def start_drag_select_mode_and_finish():
+def pick_elements_to_process():
+    # Drag-selection plus the confirmation dialog; returns the selected
+    # elements, or None when the user backs out or the pick fails.
     try:
         uidoc = revit.uidoc
-        doc = revit.doc
         selected_elements = uidoc.Selection.PickElementsByRectangle("Select elements by dragging a region")
         if selected_elements:
             dialog = TaskDialog("Finish Selection")
@@ -125,17 +363,18 @@ def start_drag_select_mode_and_finish():
             dialog.DefaultButton = TaskDialogResult.CommandLink1
             result = dialog.Show()
             if result == TaskDialogResult.CommandLink1:
-                process_selected_elements(selected_elements)
+                return selected_elements
             else:
                 TaskDialog.Show("Selection Cancelled", "The selection was cancelled.")
         else:
             TaskDialog.Show("No Elements Selected", "No elements were selected, operation aborted.")
     except Exception as e:
         TaskDialog.Show("Selection Error", "Error occurred during selection: {}".format(str(e)))
+    return None
 
 family_instance_data = {}
 
-def process_selected_elements(selected_elements):
+def process_selected_elements(selected_elements, host_index):
     global family_instance_data
     for element in selected_elements:
         element_id = element.Id
@@ -143,7 +382,8 @@ def process_selected_elements(selected_elements):
         location_point = None
         sleeve_length = "No Sleeve Length"
         sleeve_cod = "No Sleeve COD"
-        sleeve_diameter = "No Sleeve Diameter"
+        sleeve_diameter_mm = None
+        sleeve_diameter_display = "No Sleeve Diameter"
         intersecting_elements = []
 
         if isinstance(element, DB.FamilyInstance):
@@ -161,22 +401,25 @@ def process_selected_elements(selected_elements):
                 if sleeve_cod_param:
                     sleeve_cod = sleeve_cod_param.AsValueString() or "No Value"
 
-                sleeve_diameter_param = element.Symbol.LookupParameter("Sleeve Diameter")
-                if sleeve_diameter_param:
-                    sleeve_diameter = sleeve_diameter_param.AsDouble() * 304.8
-                    sleeve_diameter = "{:.2f} mm".format(sleeve_diameter)
+                sleeve_diameter_mm = sleeve_diameter_of(element.Symbol)
+                if sleeve_diameter_mm is not None:
+                    sleeve_diameter_display = "{:.2f} mm".format(sleeve_diameter_mm)
                 else:
-                    sleeve_diameter = "Sleeve Diameter Not Found"
-
-                equip_bbox = element.get_BoundingBox(None)
-                for wall in wall_collector:
-                    wall_bbox = wall.get_BoundingBox(None)
-                    if wall_bbox and equip_bbox and do_bounding_boxes_intersect(equip_bbox, wall_bbox):
-                        intersecting_elements.append({'id': wall.Id, 'type': 'Wall'})
-                for beam in beam_collector:
-                    beam_bbox = beam.get_BoundingBox(None)
-                    if beam_bbox and equip_bbox and do_bounding_boxes_intersect(equip_bbox, beam_bbox):
-                        intersecting_elements.append({'id': beam.Id, 'type': 'Beam'})
+                    sleeve_diameter_display = "Sleeve Diameter Not Found"
+
+                equip_bbox = bbox_of(element)
+                if equip_bbox:
+                    for host_id, host_type in host_index.intersection(bbox_to_bounds(equip_bbox)):
+                        # Resolve the element and its type once per hit so the
+                        # placement loop never goes back through GetElement.
+                        host = doc.GetElement(host_id)
+                        if host is None:
+                            continue
+                        intersecting_elements.append({
+                            'element': host,
+                            'type_element': doc.GetElement(host.GetTypeId()),
+                            'type': host_type,
+                        })
 
             except Exception as e:
                 pass
@@ -186,17 +429,98 @@ def process_selected_elements(selected_elements):
             'location': location_point,
             'sleeve_length': sleeve_length,
             'sleeve_cod': sleeve_cod,
-            'sleeve_diameter': sleeve_diameter,
+            'sleeve_diameter_mm': sleeve_diameter_mm,
+            'sleeve_diameter_display': sleeve_diameter_display,
+            'sleeve_z': location_point.Z if location_point else None,
             'intersecting_elements': intersecting_elements
         }
 
     # End of process_selected_elements (debugging output removed)
 
-start_drag_select_mode_and_finish()
-level_collector = DB.FilteredElementCollector(doc).OfClass(DB.Level)
-levels_dict = {lvl.Id: lvl for lvl in level_collector}
+def place_family_instance_at_location(equip_element, first_symbol, face, location_point):
+    adjusted_location = location_point
+    face_normal = face.ComputeNormal(CENTER_UV)
+    reference_direction = face_normal.CrossProduct(DB.XYZ.BasisX)
+    if reference_direction.IsZeroLength():
+        reference_direction = face_normal.CrossProduct(DB.XYZ.BasisY)
+    reference_direction = reference_direction.Normalize()
+    new_instance = doc.Create.NewFamilyInstance(face.Reference, adjusted_location, reference_direction, first_symbol)
+    return new_instance
+
+def host_geometry(host, compute_references):
+    # Computing stable references materializes one per face and edge, which
+    # is the expensive part of get_Geometry - the screening pass skips it.
+    # The detail level is left at its default on purpose: structural framing
+    # at Coarse detail is the stick representation (a location curve, no
+    # solids), which would leave the screen with nothing to test.
+    options = DB.Options()
+    if compute_references:
+        options.ComputeReferences = True
+    return host.get_Geometry(options)
 
-if family_symbols_dict:
+def compute_placement_plan(element):
+    # Read-only half of a sleeve placement: geometry queries, face search and
+    # parameter reads, no document writes. Returns a dict describing either a
+    # face-hosted placement ('face' set) or the point fallback ('fallback_host'
+    # set), or None when the equipment has nothing to cut.
+    loc = element.Location
+    if not isinstance(loc, DB.LocationPoint):
+        return None
+    host_data = family_instance_data.get(element.Id, {})
+    intersections = host_data.get('intersecting_elements', [])
+    if not intersections:
+        return None
+    sleeve_diameter = host_data.get('sleeve_diameter_mm') or 0.0
+    sleeve_z = host_data.get('sleeve_z')
+    equip_bbox = bbox_of(element)
+    far_end_point = get_opposite_face_of_equipment(equip_bbox)
+
+    for intersect in intersections:
+        if intersect['type'] == 'Beam':
+            host = intersect['element']
+            # The sleeve cuts its host at the insertion point's Z, a much
+            # tighter test than the whole-equipment AABB overlap - skip hosts
+            # that are merely tall before fetching any geometry.
+            if sleeve_z is not None:
+                host_bbox = bbox_of(host)
+                if host_bbox and not (host_bbox.Min.Z - SLEEVE_Z_TOLERANCE
+                                      <= sleeve_z
+                                      <= host_bbox.Max.Z + SLEEVE_Z_TOLERANCE):
+                    continue
+            beam_type = intersect['type_element']
+            beam_width = beam_width_of(beam_type) if beam_type else None  # in mm
+            if beam_width is None:
+                continue
+            # Screen with coarse, reference-free geometry first; only a host
+            # that yields a candidate face pays for the reference-bearing
+            # fetch that the final placement needs.
+            screen_face = find_intersecting_face_based_on_far_end(
+                host_geometry(host, False), far_end_point, equip_bbox)
+            if screen_face is None:
+                continue
+            face = find_intersecting_face_based_on_far_end(
+                host_geometry(host, True), far_end_point, equip_bbox)
+            if face and face.Reference:
+                return {
+                    'element': element,
+                    'location': loc.Point,
+                    'face': face,
+                    'beam_width': beam_width,
+                    'sleeve_diameter': sleeve_diameter,
+                    'fallback_host': None,
+                    'far_end_point': far_end_point,
+                }
+    return {
+        'element': element,
+        'location': loc.Point,
+        'face': None,
+        'beam_width': None,
+        'sleeve_diameter': sleeve_diameter,
+        'fallback_host': intersections[0]['element'],
+        'far_end_point': far_end_point,
+    }
+
+def place_sleeves(equips, family_symbols_dict):
     for fname, symbol_ids in family_symbols_dict.items():
         if symbol_ids:
             first_symbol_id = ElementId(int(symbol_ids[0]))
@@ -210,74 +534,60 @@ if family_symbols_dict:
                 first_symbol.Activate()
                 t_act.Commit()
 
-            def place_family_instance_at_location(equip_element, first_symbol, face, location_point):
-                adjusted_location = location_point
-                face_normal = face.ComputeNormal(DB.UV(0.5, 0.5))
-                reference_direction = face_normal.CrossProduct(DB.XYZ.BasisX)
-                if reference_direction.IsZeroLength():
-                    reference_direction = face_normal.CrossProduct(DB.XYZ.BasisY)
-                reference_direction = reference_direction.Normalize()
-                new_instance = doc.Create.NewFamilyInstance(face.Reference, adjusted_location, reference_direction, first_symbol)
-                return new_instance
+            # Phase 1 (read-only): plan every placement outside the
+            # transaction so the write phase below touches the document and
+            # nothing else.
+            plans = []
+            for element in equips:
+                if isinstance(element, DB.FamilyInstance):
+                    try:
+                        plan = compute_placement_plan(element)
+                        if plan:
+                            plans.append(plan)
+                    except Exception as e:
+                        pass
 
+            # Phase 2 (write-only): create the instances and set their
+            # parameters inside a single transaction.
             placed_instance_count = 0
-            with revit.Transaction("Place Family Instances"):
-                for element in element_collector:
-                    if isinstance(element, DB.FamilyInstance):
-                        try:
-                            loc = element.Location
-                            if not isinstance(loc, DB.LocationPoint):
-                                continue
-                            location_point = loc.Point
-                            host_data = family_instance_data.get(element.Id, {})
-                            sleeve_diameter = host_data.get('sleeve_diameter')
-                            intersections = host_data.get('intersecting_elements', [])
-                            if not intersections:
-                                continue
-                            if isinstance(sleeve_diameter, str) and "mm" in sleeve_diameter:
-                                sleeve_diameter = float(sleeve_diameter.replace(" mm", ""))
-                            else:
-                                sleeve_diameter = 0.0
-
-                            instance_placed = False
-                            for intersect in intersections:
-                                if intersect['type'] == 'Beam':
-                                    host = doc.GetElement(intersect['id'])
-                                    if host:
-                                        beam_type = doc.GetElement(host.GetTypeId())
-                                        if beam_type:
-                                            width_param = beam_type.LookupParameter("b")
-                                            if not width_param:
-                                                width_param = beam_type.LookupParameter("B")
-                                            if width_param and width_param.StorageType == StorageType.Double:
-                                                beam_width = width_param.AsDouble() * 304.8  # in mm
-                                            else:
-                                                continue
-                                        else:
-                                            continue
-                                        geom_options = DB.Options()
-                                        geom_options.ComputeReferences = True
-                                        geo_element = host.get_Geometry(geom_options)
-                                        equip_bbox = element.get_BoundingBox(None)
-                                        far_end_point = get_opposite_face_of_equipment(element)
-                                        face = find_intersecting_face_based_on_far_end(geo_element, far_end_point, equip_bbox)
-                                        if face and face.Reference:
-                                            new_instance = place_family_instance_at_location(element, first_symbol, face, location_point)
-                                            for param in new_instance.Parameters:
-                                                param_name = param.Definition.Name
-                                                if "Length" in param_name and param.StorageType == StorageType.Double:
-                                                    param.Set(beam_width / 304.8)  # Convert mm to feet.
-                                                if "Outer Diameter" in param_name and param.StorageType == StorageType.Double:
-                                                    param.Set((sleeve_diameter + 2) / 304.8)
-                                            placed_instance_count += 1
-                                            instance_placed = True
-                                            break
-                            if not instance_placed and intersections:
-                                fallback_host = doc.GetElement(intersections[0]['id'])
-                                new_instance = doc.Create.NewFamilyInstance(
-                                    far_end_point, first_symbol, fallback_host, DB.Structure.StructuralType.NonStructural
-                                )
-                                placed_instance_count += 1
-                        except Exception as e:
-                            pass
+            # swallow_errors installs pyRevit's silent failure preprocessor so
+            # placement warnings never pop modal dialogs mid-batch; the
+            # document regenerates once at commit instead of per placement.
+            with revit.Transaction("Place Family Instances",
+                                   clear_after_rollback=True,
+                                   swallow_errors=True):
+                for plan in plans:
+                    try:
+                        if plan['face'] is not None:
+                            new_instance = place_family_instance_at_location(
+                                plan['element'], first_symbol, plan['face'], plan['location'])
+                            length_param = new_instance.LookupParameter("Length")
+                            if length_param and length_param.StorageType == StorageType.Double:
+                                length_param.Set(plan['beam_width'] / 304.8)  # Convert mm to feet.
+                            diameter_param = new_instance.LookupParameter("Outer Diameter")
+                            if diameter_param and diameter_param.StorageType == StorageType.Double:
+                                diameter_param.Set((plan['sleeve_diameter'] + 2) / 304.8)
+                        else:
+                            doc.Create.NewFamilyInstance(
+                                plan['far_end_point'], first_symbol, plan['fallback_host'],
+                                DB.Structure.StructuralType.NonStructural
+                            )
+                        placed_instance_count += 1
+                    except Exception as e:
+                        pass
             TaskDialog.Show("Sleeves Placement", "Total Sleeves Placed: {}".format(placed_instance_count))
+
+def main():
+    selected_elements = pick_elements_to_process()
+    if selected_elements is None:
+        return
+    equips = collect_equipment()
+    walls, beams = collect_hosts(selection_outline(selected_elements))
+    host_index = build_host_index(walls, beams)
+    process_selected_elements(selected_elements, host_index)
+    levels_dict = {lvl.Id: lvl for lvl in DB.FilteredElementCollector(doc).OfClass(DB.Level)}
+    family_symbols_dict = collect_family_symbols()
+    if family_symbols_dict:
+        place_sleeves(equips, family_symbols_dict)
+
+main()